@@ -1,29 +1,57 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError, OperationFailure
 import os
+import hmac
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict, EmailStr
+from pydantic import BaseModel, Field, ConfigDict, EmailStr, field_validator
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone
 import re
+import orjson
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
 # MongoDB connection
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+client = AsyncIOMotorClient(
+    mongo_url,
+    maxPoolSize=50,
+    compressors="zstd,zlib",
+    retryWrites=True
+)
 db = client[os.environ['DB_NAME']]
 
+# Contact fields whose unique index was built at startup; signup pre-checks the rest
+_unique_contact_fields = set()
+
+# MongoDB error code for dropping an index that no longer exists
+_INDEX_NOT_FOUND = 27
+
 # Admin PIN from environment (default: 1234)
 ADMIN_PIN = os.environ.get('ADMIN_PIN', '1234')
 
+class FastResponse(ORJSONResponse):
+    """ORJSON response that falls back to str() for types orjson can't encode"""
+
+    def render(self, content) -> bytes:
+        # Mongo hands back naive UTC datetimes; emit them as ISO-8601 with a "Z" suffix
+        return orjson.dumps(
+            content,
+            default=str,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+        )
+
 # Create the main app
-app = FastAPI()
+app = FastAPI(default_response_class=FastResponse)
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -44,7 +72,11 @@ class CustomerResponse(BaseModel):
     email: Optional[str] = None
     punches: int = 0
     total_spent: float = 0.0
-    created_at: str
+    created_at: datetime
+
+class CustomerListItem(CustomerResponse):
+    available_rewards: List[dict] = []
+    next_reward: dict
 
 class TransactionResponse(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -56,7 +88,10 @@ class TransactionResponse(BaseModel):
     punches_added: int
     reward_redeemed: Optional[str] = None
     discount_percent: Optional[int] = None
-    created_at: str
+    created_at: datetime
+
+# Only the fields clients use, so stray document fields never travel over the wire
+_TRANSACTION_PROJECTION = {"_id": 0, **{field: 1 for field in TransactionResponse.model_fields}}
 
 class AddPunchRequest(BaseModel):
     customer_id: str
@@ -72,250 +107,323 @@ class AdminLoginRequest(BaseModel):
 class CustomerLookupRequest(BaseModel):
     identifier: str  # phone or email
 
+    @field_validator("identifier")
+    @classmethod
+    def strip_identifier(cls, v: str) -> str:
+        return v.strip()
+
+    @property
+    def is_email(self) -> bool:
+        return "@" in self.identifier
+
 # ============== Helper Functions ==============
 
+_PHONE_RE = re.compile(r"\D")
+_DIGITS_ONLY_RE = re.compile(r"^\d+$")
+
+def normalize_phone(phone: Optional[str]) -> Optional[str]:
+    """Strip everything but digits so a phone number has one canonical form"""
+    if not phone:
+        return None
+    return _PHONE_RE.sub("", phone) or None
+
+def new_id() -> str:
+    """Generate a document id (hex form skips str()'s dash formatting)"""
+    return uuid.uuid4().hex
+
+def utc_now() -> datetime:
+    """Current UTC time, stored as a BSON date and rendered as ISO-8601 by FastResponse"""
+    return datetime.now(timezone.utc)
+
 def calculate_punches(amount: float) -> int:
     """Calculate punches: 1 punch per $10 spent"""
     return int(amount // 10)
 
-def get_available_rewards(punches: int) -> list:
+# Reward tiers are fixed, so build them once and hand out shared references
+_REWARD_10 = {"tier": 10, "discount": 15, "label": "15% Off"}
+_REWARD_15 = {"tier": 15, "discount": 20, "label": "20% Off"}
+_REWARD_20 = {"tier": 20, "discount": 25, "label": "25% Off"}
+_REWARD_TIERS = (_REWARD_10, _REWARD_15, _REWARD_20)
+_TIER_DISCOUNTS = {reward["tier"]: reward["discount"] for reward in _REWARD_TIERS}
+
+# Rewards unlocked after passing 0, 1, 2 or 3 tier thresholds
+_AVAILABLE_REWARDS = (
+    (),
+    (_REWARD_10,),
+    (_REWARD_10, _REWARD_15),
+    (_REWARD_10, _REWARD_15, _REWARD_20),
+)
+_MAX_REWARD_REACHED = {"tier": 20, "discount": 25, "punches_needed": 0, "max_reached": True}
+
+def _tiers_reached(punches: int) -> int:
+    """Number of reward thresholds the punch count has passed (0-3)"""
+    return (punches >= 10) + (punches >= 15) + (punches >= 20)
+
+def get_available_rewards(punches: int) -> tuple:
     """Get list of available rewards based on punch count"""
-    rewards = []
-    if punches >= 10:
-        rewards.append({"tier": 10, "discount": 15, "label": "15% Off"})
-    if punches >= 15:
-        rewards.append({"tier": 15, "discount": 20, "label": "20% Off"})
-    if punches >= 20:
-        rewards.append({"tier": 20, "discount": 25, "label": "25% Off"})
-    return rewards
+    return _AVAILABLE_REWARDS[_tiers_reached(punches)]
 
 def get_next_reward(punches: int) -> dict:
     """Get the next reward tier info"""
-    if punches < 10:
-        return {"tier": 10, "discount": 15, "punches_needed": 10 - punches}
-    elif punches < 15:
-        return {"tier": 15, "discount": 20, "punches_needed": 15 - punches}
-    elif punches < 20:
-        return {"tier": 20, "discount": 25, "punches_needed": 20 - punches}
-    else:
-        return {"tier": 20, "discount": 25, "punches_needed": 0, "max_reached": True}
+    reached = _tiers_reached(punches)
+    if reached == len(_REWARD_TIERS):
+        return _MAX_REWARD_REACHED
+    reward = _REWARD_TIERS[reached]
+    return {"tier": reward["tier"], "discount": reward["discount"], "punches_needed": reward["tier"] - punches}
+
+def available_rewards_expr(punches: str = "$punches") -> dict:
+    """Aggregation expression equivalent of get_available_rewards"""
+    return {"$switch": {
+        "branches": [
+            {"case": {"$gte": [punches, reward["tier"]]},
+             "then": {"$literal": list(_AVAILABLE_REWARDS[count])}}
+            for count, reward in reversed(list(enumerate(_REWARD_TIERS, start=1)))
+        ],
+        "default": [],
+    }}
+
+def next_reward_expr(punches: str = "$punches") -> dict:
+    """Aggregation expression equivalent of get_next_reward"""
+    return {"$switch": {
+        "branches": [
+            {"case": {"$lt": [punches, reward["tier"]]},
+             "then": {"tier": reward["tier"], "discount": reward["discount"],
+                      "punches_needed": {"$subtract": [reward["tier"], punches]}}}
+            for reward in _REWARD_TIERS
+        ],
+        "default": {"$literal": _MAX_REWARD_REACHED},
+    }}
+
+async def find_customer_profile(match: dict) -> Optional[dict]:
+    """Fetch a customer with recent transactions and reward info in one round trip"""
+    profiles = await db.customers.aggregate([
+        {"$match": match},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "transactions",
+            "let": {"cid": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$customer_id", "$$cid"]}}},
+                {"$sort": {"created_at": -1}},
+                {"$limit": 50},
+                {"$project": {"_id": 0}},
+            ],
+            "as": "transactions",
+        }},
+        {"$addFields": {
+            "available_rewards": available_rewards_expr(),
+            "next_reward": next_reward_expr(),
+        }},
+        {"$project": {"_id": 0}},
+    ]).to_list(1)
+    
+    if not profiles:
+        return None
+    
+    customer = profiles[0]
+    transactions = customer.pop("transactions")
+    available_rewards = customer.pop("available_rewards")
+    next_reward = customer.pop("next_reward")
+    return {
+        "customer": customer,
+        "transactions": transactions,
+        "available_rewards": available_rewards,
+        "next_reward": next_reward
+    }
 
 # ============== Customer Routes ==============
 
-@api_router.post("/customers/signup", response_model=dict)
+@api_router.post("/customers/signup")
 async def signup_customer(customer: CustomerCreate):
     """Create a new customer account"""
-    if not customer.phone and not customer.email:
+    phone = normalize_phone(customer.phone)
+    if not phone and not customer.email:
         raise HTTPException(status_code=400, detail="Phone or email is required")
     
-    # Check if customer already exists
-    query = []
-    if customer.phone:
-        query.append({"phone": customer.phone})
-    if customer.email:
-        query.append({"email": customer.email.lower()})
+    email = customer.email.lower() if customer.email else None
     
+    # Fields without a unique index can't rely on the insert to reject duplicates
+    query = [
+        {field: value} for field, value in (("phone", phone), ("email", email))
+        if value and field not in _unique_contact_fields
+    ]
     if query:
-        existing = await db.customers.find_one({"$or": query}, {"_id": 0})
+        existing = await db.customers.find_one({"$or": query}, {"_id": 1})
         if existing:
             raise HTTPException(status_code=400, detail="Customer with this phone or email already exists")
     
     customer_doc = {
-        "id": str(uuid.uuid4()),
+        "id": new_id(),
         "name": customer.name,
-        "phone": customer.phone,
-        "email": customer.email.lower() if customer.email else None,
+        "phone": phone,
+        "email": email,
         "punches": 0,
         "total_spent": 0.0,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": utc_now()
     }
     
-    await db.customers.insert_one(customer_doc)
+    try:
+        await db.customers.insert_one(customer_doc)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Customer with this phone or email already exists")
     
     # Remove MongoDB _id before returning
     customer_doc.pop("_id", None)
     
-    return {
+    return FastResponse({
         "customer": customer_doc,
         "available_rewards": get_available_rewards(0),
         "next_reward": get_next_reward(0)
-    }
+    })
 
-@api_router.post("/customers/lookup", response_model=dict)
+@api_router.post("/customers/lookup")
 async def lookup_customer(request: CustomerLookupRequest):
     """Find customer by phone or email"""
-    identifier = request.identifier.strip().lower()
-    
-    # Try to find by phone or email
-    customer = await db.customers.find_one(
-        {"$or": [
-            {"phone": identifier},
-            {"phone": request.identifier.strip()},  # Keep original case for phone
-            {"email": identifier}
-        ]},
-        {"_id": 0}
-    )
+    # Emails contain "@"; anything else is treated as a phone number
+    if request.is_email:
+        profile = await find_customer_profile({"email": request.identifier.lower()})
+    else:
+        phone = normalize_phone(request.identifier)
+        profile = await find_customer_profile({"phone": phone}) if phone else None
     
-    if not customer:
+    if not profile:
         raise HTTPException(status_code=404, detail="Customer not found")
     
-    # Get transactions
-    transactions = await db.transactions.find(
-        {"customer_id": customer["id"]},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(50)
-    
-    return {
-        "customer": customer,
-        "transactions": transactions,
-        "available_rewards": get_available_rewards(customer["punches"]),
-        "next_reward": get_next_reward(customer["punches"])
-    }
+    return FastResponse(profile)
 
-@api_router.get("/customers/{customer_id}", response_model=dict)
+@api_router.get("/customers/{customer_id}")
 async def get_customer(customer_id: str):
     """Get customer details by ID"""
-    customer = await db.customers.find_one({"id": customer_id}, {"_id": 0})
+    profile = await find_customer_profile({"id": customer_id})
     
-    if not customer:
+    if not profile:
         raise HTTPException(status_code=404, detail="Customer not found")
     
-    transactions = await db.transactions.find(
-        {"customer_id": customer_id},
-        {"_id": 0}
-    ).sort("created_at", -1).to_list(50)
-    
-    return {
-        "customer": customer,
-        "transactions": transactions,
-        "available_rewards": get_available_rewards(customer["punches"]),
-        "next_reward": get_next_reward(customer["punches"])
-    }
+    return FastResponse(profile)
 
 # ============== Admin Routes ==============
 
 @api_router.post("/admin/login")
 async def admin_login(request: AdminLoginRequest):
     """Verify admin PIN"""
-    if request.pin == ADMIN_PIN:
-        return {"success": True, "message": "Login successful"}
+    if hmac.compare_digest(request.pin.encode(), ADMIN_PIN.encode()):
+        return FastResponse({"success": True, "message": "Login successful"})
     raise HTTPException(status_code=401, detail="Invalid PIN")
 
-@api_router.get("/admin/customers", response_model=List[dict])
+@api_router.get("/admin/customers", responses={200: {"model": List[CustomerListItem]}})
 async def list_all_customers():
     """Get all customers (admin only)"""
-    customers = await db.customers.find({}, {"_id": 0}).sort("created_at", -1).to_list(1000)
-    
-    # Add reward info to each customer
-    for customer in customers:
-        customer["available_rewards"] = get_available_rewards(customer["punches"])
-        customer["next_reward"] = get_next_reward(customer["punches"])
-    
-    return customers
-
-@api_router.post("/admin/add-punch", response_model=dict)
+    # Reward info is computed server-side so documents come back ready to send
+    customers = await db.customers.aggregate([
+        {"$sort": {"created_at": -1}},
+        {"$limit": 1000},
+        {"$addFields": {
+            "available_rewards": available_rewards_expr(),
+            "next_reward": next_reward_expr(),
+        }},
+        {"$project": {"_id": 0}},
+    ], batchSize=1000).to_list(1000)
+    
+    return FastResponse(customers)
+
+@api_router.post("/admin/add-punch")
 async def add_punch(request: AddPunchRequest):
     """Add punches based on transaction amount"""
-    customer = await db.customers.find_one({"id": request.customer_id}, {"_id": 0})
-    
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
-    
     punches_to_add = calculate_punches(request.amount)
     
     if punches_to_add <= 0:
         raise HTTPException(status_code=400, detail="Amount must be at least $10 to earn punches")
     
-    new_punches = customer["punches"] + punches_to_add
-    new_total_spent = customer["total_spent"] + request.amount
-    
-    # Update customer
-    await db.customers.update_one(
+    # Update customer and fetch the result in a single round trip
+    updated_customer = await db.customers.find_one_and_update(
         {"id": request.customer_id},
-        {"$set": {"punches": new_punches, "total_spent": new_total_spent}}
+        {"$inc": {"punches": punches_to_add, "total_spent": request.amount}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
+    if not updated_customer:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    
+    new_punches = updated_customer["punches"]
+    
     # Create transaction record
     transaction = {
-        "id": str(uuid.uuid4()),
+        "id": new_id(),
         "customer_id": request.customer_id,
-        "customer_name": customer["name"],
+        "customer_name": updated_customer["name"],
         "amount": request.amount,
         "punches_added": punches_to_add,
         "reward_redeemed": None,
         "discount_percent": None,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": utc_now()
     }
     await db.transactions.insert_one(transaction)
     transaction.pop("_id", None)
     
-    # Get updated customer
-    updated_customer = await db.customers.find_one({"id": request.customer_id}, {"_id": 0})
-    
-    return {
+    return FastResponse({
         "customer": updated_customer,
         "transaction": transaction,
         "punches_added": punches_to_add,
         "available_rewards": get_available_rewards(new_punches),
         "next_reward": get_next_reward(new_punches)
-    }
+    })
 
-@api_router.post("/admin/redeem-reward", response_model=dict)
+@api_router.post("/admin/redeem-reward")
 async def redeem_reward(request: RedeemRewardRequest):
     """Redeem a reward for customer"""
-    customer = await db.customers.find_one({"id": request.customer_id}, {"_id": 0})
-    
-    if not customer:
-        raise HTTPException(status_code=404, detail="Customer not found")
-    
     # Validate tier
-    tier_discounts = {10: 15, 15: 20, 20: 25}
-    if request.tier not in tier_discounts:
+    if request.tier not in _TIER_DISCOUNTS:
         raise HTTPException(status_code=400, detail="Invalid reward tier")
     
-    if customer["punches"] < request.tier:
-        raise HTTPException(status_code=400, detail=f"Not enough punches. Need {request.tier}, have {customer['punches']}")
+    discount = _TIER_DISCOUNTS[request.tier]
     
-    discount = tier_discounts[request.tier]
-    new_punches = customer["punches"] - request.tier
-    
-    # Update customer
-    await db.customers.update_one(
-        {"id": request.customer_id},
-        {"$set": {"punches": new_punches}}
+    # Deduct punches only if the customer has enough, in a single round trip
+    updated_customer = await db.customers.find_one_and_update(
+        {"id": request.customer_id, "punches": {"$gte": request.tier}},
+        {"$inc": {"punches": -request.tier}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
+    if not updated_customer:
+        customer = await db.customers.find_one({"id": request.customer_id}, {"_id": 0, "punches": 1})
+        if not customer:
+            raise HTTPException(status_code=404, detail="Customer not found")
+        raise HTTPException(status_code=400, detail=f"Not enough punches. Need {request.tier}, have {customer['punches']}")
+    
+    new_punches = updated_customer["punches"]
+    
     # Create transaction record
     transaction = {
-        "id": str(uuid.uuid4()),
+        "id": new_id(),
         "customer_id": request.customer_id,
-        "customer_name": customer["name"],
+        "customer_name": updated_customer["name"],
         "amount": 0,
         "punches_added": -request.tier,
         "reward_redeemed": f"{discount}% Off",
         "discount_percent": discount,
-        "created_at": datetime.now(timezone.utc).isoformat()
+        "created_at": utc_now()
     }
     await db.transactions.insert_one(transaction)
     transaction.pop("_id", None)
     
-    # Get updated customer
-    updated_customer = await db.customers.find_one({"id": request.customer_id}, {"_id": 0})
-    
-    return {
+    return FastResponse({
         "customer": updated_customer,
         "transaction": transaction,
         "reward_redeemed": f"{discount}% Off",
         "punches_used": request.tier,
         "available_rewards": get_available_rewards(new_punches),
         "next_reward": get_next_reward(new_punches)
-    }
+    })
 
-@api_router.get("/admin/transactions", response_model=List[dict])
+@api_router.get("/admin/transactions", responses={200: {"model": List[TransactionResponse]}})
 async def get_all_transactions():
     """Get all transactions (admin only)"""
-    transactions = await db.transactions.find({}, {"_id": 0}).sort("created_at", -1).to_list(500)
-    return transactions
+    transactions = await db.transactions.find(
+        {}, _TRANSACTION_PROJECTION
+    ).sort("created_at", -1).limit(500).batch_size(500).to_list(500)
+    return FastResponse(transactions)
 
 @api_router.delete("/admin/customers/{customer_id}")
 async def delete_customer(customer_id: str):
@@ -331,32 +439,37 @@ async def delete_customer(customer_id: str):
     # Delete customer
     await db.customers.delete_one({"id": customer_id})
     
-    return {"success": True, "message": f"Customer {customer['name']} deleted successfully"}
+    return FastResponse({"success": True, "message": f"Customer {customer['name']} deleted successfully"})
 
 @api_router.get("/admin/check-duplicate")
 async def check_duplicate(phone: str = None, email: str = None):
     """Check if customer with phone/email already exists"""
     query = []
+    phone = normalize_phone(phone)
     if phone:
         query.append({"phone": phone})
     if email:
         query.append({"email": email.lower()})
     
     if not query:
-        return {"exists": False}
+        return FastResponse({"exists": False})
     
     existing = await db.customers.find_one({"$or": query}, {"_id": 0})
-    return {"exists": bool(existing), "customer": existing if existing else None}
+    return FastResponse({"exists": bool(existing), "customer": existing if existing else None})
 
 # ============== Base Routes ==============
 
 @api_router.get("/")
 async def root():
-    return {"message": "The Crafty Couple's Rewards API"}
+    return FastResponse({"message": "The Crafty Couple's Rewards API"})
 
 @api_router.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    return FastResponse({"status": "healthy"})
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    return FastResponse({"detail": exc.detail}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -376,6 +489,97 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# ============== Migrations ==============
+
+async def normalize_stored_phones():
+    """Rewrite phones saved before normalization to digits only (idempotent)"""
+    updates = [
+        UpdateOne({"_id": doc["_id"]}, {"$set": {"phone": normalize_phone(doc["phone"])}})
+        async for doc in db.customers.find(
+            {"phone": {"$type": "string", "$not": _DIGITS_ONLY_RE}}, {"phone": 1}
+        )
+    ]
+    if updates:
+        await db.customers.bulk_write(updates, ordered=False)
+        logger.info("Normalized %d stored phone numbers", len(updates))
+
+async def convert_created_at_to_dates():
+    """Rewrite ISO-string created_at values saved before BSON dates (idempotent)"""
+    for collection in (db.customers, db.transactions):
+        updates = []
+        async for doc in collection.find({"created_at": {"$type": "string"}}, {"created_at": 1}):
+            try:
+                created_at = datetime.fromisoformat(doc["created_at"])
+            except ValueError:
+                logger.warning("Skipping unparseable created_at %r in %s", doc["created_at"], collection.name)
+                continue
+            updates.append(UpdateOne({"_id": doc["_id"]}, {"$set": {"created_at": created_at}}))
+        if updates:
+            await collection.bulk_write(updates, ordered=False)
+            logger.info("Converted %d created_at values to dates in %s", len(updates), collection.name)
+
+async def ensure_unique_customer_index(field: str):
+    """Build a partial unique index on a contact field, falling back to a plain one"""
+    # Partial unique indexes let signup rely on the insert to reject duplicates
+    # while still allowing any number of customers without a phone or email
+    try:
+        await db.customers.create_index(
+            field,
+            name=f"{field}_unique",
+            unique=True,
+            partialFilterExpression={field: {"$type": "string"}}
+        )
+    except OperationFailure as exc:
+        # Existing duplicates must be merged by hand; until then signup pre-checks
+        logger.error("Could not build unique %s index, signup will check for duplicates itself: %s", field, exc)
+        indexes = await db.customers.index_information()
+        if f"{field}_1" not in indexes:
+            await db.customers.create_index(field, name=f"{field}_lookup", sparse=True)
+        return
+    
+    _unique_contact_fields.add(field)
+    
+    # Plain indexes on the same key are redundant once the unique one exists
+    indexes = await db.customers.index_information()
+    for name in (f"{field}_1", f"{field}_lookup"):
+        if name in indexes:
+            try:
+                await db.customers.drop_index(name)
+            except OperationFailure as exc:
+                # Another worker running the same startup hook may have dropped it first
+                if exc.code != _INDEX_NOT_FOUND:
+                    raise
+
+@app.on_event("startup")
+async def create_indexes():
+    """Ensure indexes backing the customer and transaction queries exist"""
+    # Backfills run first so indexes are built over normalized values
+    await normalize_stored_phones()
+    await convert_created_at_to_dates()
+    
+    await db.customers.create_index("id", unique=True)
+    await ensure_unique_customer_index("phone")
+    await ensure_unique_customer_index("email")
+    await db.customers.create_index([("created_at", -1)])
+    await db.transactions.create_index([("customer_id", 1), ("created_at", -1)])
+    await db.transactions.create_index([("created_at", -1)])
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop + httptools replace the pure-Python event loop and HTTP parser;
+    # "auto" picks uvloop whenever it is installed (it has no Windows build)
+    uvicorn.run(
+        "server:app",
+        app_dir=str(ROOT_DIR),
+        host=os.environ.get('HOST', '0.0.0.0'),
+        port=int(os.environ.get('PORT', '8001')),
+        loop="auto",
+        http="httptools",
+        workers=int(os.environ.get('WEB_CONCURRENCY', '1')),
+        proxy_headers=True
+    )
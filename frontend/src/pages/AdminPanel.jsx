@@ -163,9 +163,11 @@ const AdminPanel = () => {
     }
   };
 
+  // Phones are stored as digits only, so match against the digits typed
+  const phoneDigits = searchQuery.replace(/\D/g, "");
   const filteredCustomers = customers.filter(c => 
     c.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
-    c.phone?.includes(searchQuery) ||
+    (phoneDigits && c.phone?.includes(phoneDigits)) ||
     c.email?.toLowerCase().includes(searchQuery.toLowerCase())
   );
 
@@ -0,0 +1,8 @@
+import os
+import sys
+from pathlib import Path
+
+# server.py reads these at import time; no connection is made until a query runs
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "test_database")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
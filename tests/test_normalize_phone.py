@@ -0,0 +1,24 @@
+from server import normalize_phone
+
+
+def test_formatted_phone_is_reduced_to_digits():
+    assert normalize_phone("555-123-4567") == "5551234567"
+    assert normalize_phone("(555) 123 4567") == "5551234567"
+
+
+def test_country_code_prefix_keeps_its_digits():
+    assert normalize_phone("+1 555-123-4567") == "15551234567"
+
+
+def test_digits_only_phone_is_unchanged():
+    assert normalize_phone("5551234567") == "5551234567"
+
+
+def test_empty_phone_is_none():
+    assert normalize_phone("") is None
+    assert normalize_phone(None) is None
+
+
+def test_phone_without_digits_is_none():
+    assert normalize_phone("call me") is None
+    assert normalize_phone("---") is None
@@ -0,0 +1,101 @@
+import pytest
+
+import server
+from server import (
+    available_rewards_expr,
+    get_available_rewards,
+    get_next_reward,
+    next_reward_expr,
+)
+
+PUNCH_COUNTS = [0, 9, 10, 14, 15, 19, 20, 25]
+
+
+def legacy_available_rewards(punches):
+    """Original list-building implementation, kept as the reference"""
+    rewards = []
+    if punches >= 10:
+        rewards.append({"tier": 10, "discount": 15, "label": "15% Off"})
+    if punches >= 15:
+        rewards.append({"tier": 15, "discount": 20, "label": "20% Off"})
+    if punches >= 20:
+        rewards.append({"tier": 20, "discount": 25, "label": "25% Off"})
+    return rewards
+
+
+def legacy_next_reward(punches):
+    """Original if/elif implementation, kept as the reference"""
+    if punches < 10:
+        return {"tier": 10, "discount": 15, "punches_needed": 10 - punches}
+    elif punches < 15:
+        return {"tier": 15, "discount": 20, "punches_needed": 15 - punches}
+    elif punches < 20:
+        return {"tier": 20, "discount": 25, "punches_needed": 20 - punches}
+    else:
+        return {"tier": 20, "discount": 25, "punches_needed": 0, "max_reached": True}
+
+
+def evaluate(expr, punches):
+    """Evaluate the small subset of aggregation operators the reward expressions use"""
+    if expr == "$punches":
+        return punches
+    if isinstance(expr, list):
+        return [evaluate(item, punches) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if "$literal" in expr:
+        return expr["$literal"]
+    if "$switch" in expr:
+        for branch in expr["$switch"]["branches"]:
+            if evaluate(branch["case"], punches):
+                return evaluate(branch["then"], punches)
+        return evaluate(expr["$switch"]["default"], punches)
+    if "$gte" in expr:
+        left, right = evaluate(expr["$gte"], punches)
+        return left >= right
+    if "$lt" in expr:
+        left, right = evaluate(expr["$lt"], punches)
+        return left < right
+    if "$subtract" in expr:
+        left, right = evaluate(expr["$subtract"], punches)
+        return left - right
+    return {key: evaluate(value, punches) for key, value in expr.items()}
+
+
+@pytest.mark.parametrize("punches", PUNCH_COUNTS)
+def test_available_rewards_match_legacy(punches):
+    assert list(get_available_rewards(punches)) == legacy_available_rewards(punches)
+
+
+@pytest.mark.parametrize("punches", PUNCH_COUNTS)
+def test_next_reward_matches_legacy(punches):
+    assert get_next_reward(punches) == legacy_next_reward(punches)
+
+
+@pytest.mark.parametrize("punches", PUNCH_COUNTS)
+def test_available_rewards_expr_matches_legacy(punches):
+    assert evaluate(available_rewards_expr(), punches) == legacy_available_rewards(punches)
+
+
+@pytest.mark.parametrize("punches", PUNCH_COUNTS)
+def test_next_reward_expr_matches_legacy(punches):
+    assert evaluate(next_reward_expr(), punches) == legacy_next_reward(punches)
+
+
+def test_available_rewards_expr_uses_tier_constants():
+    branches = available_rewards_expr()["$switch"]["branches"]
+    tiers = list(reversed(server._REWARD_TIERS))
+    assert [branch["case"]["$gte"][1] for branch in branches] == [reward["tier"] for reward in tiers]
+    for count, branch in zip(range(len(tiers), 0, -1), branches):
+        rewards = branch["then"]["$literal"]
+        assert all(a is b for a, b in zip(rewards, server._AVAILABLE_REWARDS[count]))
+        assert len(rewards) == count
+
+
+def test_next_reward_expr_uses_tier_constants():
+    switch = next_reward_expr()["$switch"]
+    for reward, branch in zip(server._REWARD_TIERS, switch["branches"], strict=True):
+        assert branch["case"]["$lt"][1] == reward["tier"]
+        assert branch["then"]["tier"] == reward["tier"]
+        assert branch["then"]["discount"] == reward["discount"]
+    assert switch["default"]["$literal"] is server._MAX_REWARD_REACHED